@@ -0,0 +1,198 @@
+# Standard packages
+import datetime
+
+# Third-party packages
+from matplotlib import pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sb
+
+# Project packages
+from catalog import LOCATION_LABELS, LOCATIONS
+import config
+from timegrid import TimeGrid
+
+
+FIELD_TRIP_WEEKDAYS = [0, 3, 4]
+SUMMER_MONTHS = [6, 7, 8]
+MAX_GROUPS = 6
+MAX_VISITORS = 600
+
+_season = {'version': None}
+
+
+def field_trip_days(start_date, end_date) -> np.ndarray:
+    """Return the open field trip days (Mon, Thu and Fri outside summer) between two dates, inclusive."""
+
+    dates = pd.date_range(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize())
+    dates = dates[dates.weekday.isin(FIELD_TRIP_WEEKDAYS) & ~dates.month.isin(SUMMER_MONTHS)]
+    return dates.to_numpy()
+
+
+def occupancy_matrix(df: pd.DataFrame, grid: TimeGrid, start_date=None,
+                     end_date=None) -> tuple[np.ndarray, np.ndarray]:
+    """Build a date x location x slot matrix of booked slots in one pass over the reservations.
+
+    The dates are the open field trip days from start_date to end_date, which default to the first and
+    last reservation. A slot is booked when a reservation overlaps it, as in build_search_schedule().
+    Return the dates and the boolean occupancy matrix.
+    """
+
+    bookings = df[df.Location.isin(LOCATIONS) & df["Start time"].notna() & df["End time"].notna()]
+    if start_date is None:
+        start_date = bookings["Start time"].min() if len(bookings) else pd.Timestamp.now()
+    if end_date is None:
+        end_date = bookings["Start time"].max() if len(bookings) else start_date
+    dates = field_trip_days(start_date, end_date)
+
+    # Bookings on other days (or outside the range) are not counted
+    days = bookings["Start time"].dt.normalize().to_numpy()
+    on_open_day = np.isin(days, dates)
+    bookings = bookings[on_open_day]
+    days = days[on_open_day]
+    starts = bookings["Start time"]
+    ends = bookings["End time"]
+
+    date_codes = np.searchsorted(dates, days)
+    loc_codes = pd.Categorical(bookings.Location, categories=LOCATIONS).codes
+    first = np.floor((starts.dt.hour * 60 + starts.dt.minute - grid.open_minute) / grid.resolution)
+    last = np.ceil((ends.dt.hour * 60 + ends.dt.minute - grid.open_minute) / grid.resolution)
+    first = np.clip(first.to_numpy(dtype=int), 0, grid.n_slots)
+    last = np.clip(last.to_numpy(dtype=int), 0, grid.n_slots)
+    valid = last > first
+
+    # Mark each booking's first and one-past-last slot, then a running sum fills everything in between
+    counts = np.zeros((len(dates), len(LOCATIONS), grid.n_slots + 1), dtype=np.int32)
+    np.add.at(counts, (date_codes[valid], loc_codes[valid], first[valid]), 1)
+    np.add.at(counts, (date_codes[valid], loc_codes[valid], last[valid]), -1)
+    occupancy = np.cumsum(counts, axis=2)[:, :, :grid.n_slots] > 0
+
+    return dates, occupancy
+
+
+def admission_matrix(df: pd.DataFrame, dates: np.ndarray) -> pd.DataFrame:
+    """Return the admitted groups and visitors for each date, with their share of the daily limits."""
+
+    admission = df[df.Category == 'Admission']
+    by_date = admission.groupby(admission.Arrival.dt.normalize()).agg(Groups=('Address', 'nunique'),
+                                                                     Visitors=('Quantity', 'sum'))
+    load = by_date.reindex(pd.DatetimeIndex(dates), fill_value=0)
+    load["Group load"] = load.Groups / MAX_GROUPS
+    load["Visitor load"] = load.Visitors / MAX_VISITORS
+    return load
+
+
+def get_season() -> dict:
+    """Return the occupancy and admission matrices, rebuilt only when a new snapshot is published."""
+
+    global _season
+
+    season = _season
+    snapshot = config.current()
+    if season['version'] != snapshot.version:
+        dates, occupancy = occupancy_matrix(snapshot.data, snapshot.grid)
+        # Replace the whole dict so readers never mix matrices from two versions
+        season = {
+            'version': snapshot.version,
+            'grid': snapshot.grid,
+            'dates': dates,
+            'occupancy': occupancy,
+            'admission': admission_matrix(snapshot.data, dates),
+        }
+        _season = season
+    return season
+
+
+def season_mask(dates: np.ndarray, start_date=None, end_date=None) -> np.ndarray:
+    """Return a boolean mask of the dates between start_date and end_date (inclusive)."""
+
+    mask = np.ones(len(dates), dtype=bool)
+    if start_date is not None:
+        mask &= dates >= np.datetime64(pd.Timestamp(start_date))
+    if end_date is not None:
+        mask &= dates <= np.datetime64(pd.Timestamp(end_date))
+    return mask
+
+
+def slot_labels(grid: TimeGrid) -> list[str]:
+    """Return the clock time of each slot, i.e. '9:15 AM'."""
+
+    return [datetime.time(*divmod(grid.open_minute + i * grid.resolution, 60)).strftime('%I:%M %p').lstrip('0')
+            for i in range(grid.n_slots)]
+
+
+def utilization(by: str = None, start_date=None, end_date=None) -> pd.DataFrame | pd.Series:
+    """Return the share of booked slots per location.
+
+    by groups the rows by 'weekday', 'month' or 'time' (of day). Without it, return one value per location.
+    """
+
+    season = get_season()
+    mask = season_mask(season['dates'], start_date, end_date)
+    dates = pd.DatetimeIndex(season['dates'][mask])
+    occupancy = season['occupancy'][mask]
+
+    if by is None:
+        return pd.Series(occupancy.mean(axis=(0, 2)), index=LOCATIONS)
+    if by == 'time':
+        return pd.DataFrame(occupancy.mean(axis=0).T, index=slot_labels(season['grid']), columns=LOCATIONS)
+
+    if by == 'weekday':
+        keys = dates.weekday
+        labels = {i: name for i, name in enumerate(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday",
+                                                     "Saturday", "Sunday"])}
+    elif by == 'month':
+        keys = dates.month
+        labels = {i: datetime.date(2000, i, 1).strftime('%B') for i in range(1, 13)}
+    else:
+        raise ValueError("by must be None, 'weekday', 'month' or 'time'")
+
+    per_day = pd.DataFrame(occupancy.mean(axis=2), columns=LOCATIONS)
+    result = per_day.groupby(np.asarray(keys)).mean()
+    result.index = [labels[key] for key in result.index]
+    return result
+
+
+def admission_load(start_date=None, end_date=None) -> pd.DataFrame:
+    """Return the daily groups and visitors against the 6 group / 600 visitor limits."""
+
+    season = get_season()
+    return season['admission'][season_mask(season['dates'], start_date, end_date)]
+
+
+def utilization_heatmap(by: str = 'weekday', start_date=None, end_date=None):
+    """Plot utilization by weekday, month or time of day for each location as a heatmap."""
+
+    result = utilization(by, start_date, end_date)
+
+    plt.clf()
+    sb.heatmap(result, vmin=0, vmax=1, annot=True, fmt='.0%', cmap='rocket_r', cbar=False,
+               xticklabels=[LOCATION_LABELS[location] for location in LOCATIONS])
+    plt.title(f"Room utilization by {'time of day' if by == 'time' else by}", fontsize=16)
+    plt.yticks(rotation=0)
+
+    fig = plt.gcf()
+    fig.set_size_inches(10, 8 if by == 'time' else 5)
+    plt.tight_layout()
+
+    return fig
+
+
+def admission_heatmap(start_date=None, end_date=None):
+    """Plot the average daily visitor load against the 600 visitor limit by weekday and month."""
+
+    load = admission_load(start_date, end_date)
+    load = load[load.Visitors > 0]
+    table = load.pivot_table(index=load.index.day_name(), columns=load.index.month_name(), values="Visitor load",
+                             aggfunc='mean', sort=False)
+
+    plt.clf()
+    sb.heatmap(table, vmin=0, vmax=1, annot=True, fmt='.0%', cmap='rocket_r', cbar=False)
+    plt.title(f"Visitor load (of {MAX_VISITORS}) on field trip days", fontsize=16)
+    plt.yticks(rotation=0)
+
+    fig = plt.gcf()
+    fig.set_size_inches(10, 5)
+    plt.tight_layout()
+
+    return fig
@@ -0,0 +1,109 @@
+# Standard packages
+from typing import NamedTuple
+
+# Third-party packages
+import numpy as np
+import pandas as pd
+import seaborn as sb
+
+
+# Display labels for programs on the schedule bars. Other programs use their full name.
+PROGRAM_LABELS = {
+    'SCH - L - Amusement Park Physics STEM Lab': "Amusement\nPark Physics",
+    'SCH - L - Squid Dissection STEM Lab': "Squid\nDissection",
+    'SCH - D - Matter Matters': "Matter Matters",
+    'PS - School Shows': "School Show",
+    'SCH - D - Cooking Up a Storm': "Cooking Up\na Storm",
+    'SCH - L - Cow Eye Dissection STEM Lab': "Cow Eye\nDissection",
+    'SCH - D - Get Energized!': 'Get Energized!',
+    'PS - To Worlds Beyond': 'To Worlds\nBeyond',
+    'SCH - L - Splitting Molecules STEM Lab': 'Splitting\nMolecules',
+    'SCH - D - Space Exploration': 'Space\nExploration',
+    'SCH - L - Fetal Pig STEM Lab': 'Fetal Pig\nDissection',
+    'PS - Nightwatch': 'Nightwatch',
+    'SCH - D - Chemistry is a Blast!': 'Chemistry\nis a Blast',
+    "SCH - D - Shocking, It's Science!": "Shocking,\nIt's Science!",
+    "SCH - D - Get Fired Up!": 'Get Fired Up!',
+}
+
+# Locations in schedule column order; their IDs are their position, so column = ID + 1
+LOCATIONS = ["Jack Wood Hall", "Eureka Theater", "Learning Lab", "Green Classroom", "Yellow Classroom",
+             "Sudekum Planetarium"]
+LOCATION_COLUMNS = {name: i + 1 for i, name in enumerate(LOCATIONS)}
+LOCATION_LABELS = {
+    "Jack Wood Hall": "Jack Wood\nHall",
+    "Eureka Theater": "Eureka\nTheater",
+    "Learning Lab": "Learning\nLab",
+    "Green Classroom": "Green\nClassroom",
+    "Yellow Classroom": "Yellow\nClassroom",
+    "Sudekum Planetarium": "Sudekum\nPlanetarium",
+}
+
+_palette = sb.color_palette()
+EVENT_COLORS = {
+    'Arrival': _palette[1],
+    'Departure': _palette[3],
+    'Eureka Theater': _palette[4],
+    'Green Classroom': _palette[2],
+    'Jack Wood Hall': _palette[7],
+    'Learning Lab': _palette[5],
+    'Sudekum Planetarium': _palette[0],
+    'Yellow Classroom': _palette[8],
+}
+DEFAULT_EVENT_COLOR = _palette[9]
+SCHOOL_PALETTE = sb.color_palette("pastel", n_colors=10)
+
+
+class Entries(NamedTuple):
+    """Interned strings of one kind. Entry i is described by position i of each list."""
+
+    ids: dict
+    names: list[str]
+    labels: list[str]
+
+
+class Catalog(NamedTuple):
+    """Programs, locations and schools in the loaded data, mapped to small integer IDs."""
+
+    programs: Entries
+    locations: Entries
+    schools: Entries
+
+
+def make_entries(names: list[str], labels: list[str]) -> Entries:
+    """Intern names in order, with their display labels."""
+
+    return Entries({name: i for i, name in enumerate(names)}, names, labels)
+
+
+def build_catalog(df: pd.DataFrame) -> Catalog:
+    """Intern the programs, locations and schools of the reservations, once per data load."""
+
+    known = set(LOCATIONS)
+    location_names = LOCATIONS + sorted(set(df.Location.dropna()) - known)
+    locations = make_entries(location_names, [LOCATION_LABELS.get(name, name) for name in location_names])
+
+    program_names = sorted(df.Program.dropna().unique())
+    programs = make_entries(program_names, [PROGRAM_LABELS.get(name, name) for name in program_names])
+
+    school_names = sorted(df.Name.dropna().unique())
+    schools = make_entries(school_names, school_names)
+
+    return Catalog(programs, locations, schools)
+
+
+def add_ids(df: pd.DataFrame, catalog: Catalog) -> pd.DataFrame:
+    """Return the reservations with integer Program, Location and School ID columns (-1 when missing)."""
+
+    df = df.copy()
+    df["Program ID"] = pd.Categorical(df.Program, categories=catalog.programs.names).codes.astype(np.int32)
+    df["Location ID"] = pd.Categorical(df.Location, categories=catalog.locations.names).codes.astype(np.int32)
+    df["School ID"] = pd.Categorical(df.Name, categories=catalog.schools.names).codes.astype(np.int32)
+    return df
+
+
+def empty_catalog() -> Catalog:
+    """Return a catalog with only the fixed locations, for before any data is loaded."""
+
+    locations = make_entries(LOCATIONS, [LOCATION_LABELS[name] for name in LOCATIONS])
+    return Catalog(make_entries([], []), locations, make_entries([], []))
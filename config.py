@@ -1,6 +1,63 @@
+import datetime
+import threading
+from typing import NamedTuple
+
 import pandas as pd
 
+from catalog import Catalog, empty_catalog
+from timegrid import TimeGrid
+
 username: str = ''
 password: str = ''
-data: pd.DataFrame = pd.DataFrame()
-schedule_dict: dict = {}
+# Schedule rendering backend for the widgets: 'matplotlib' or 'svg'
+renderer: str = 'matplotlib'
+# URL of a running schedule_service.py; when set, the widgets query it instead of logging in
+service_url: str = ''
+# Slot resolution and operating hours used when the schedule is next built, e.g. TimeGrid(resolution=5)
+grid: TimeGrid = TimeGrid()
+
+
+class Snapshot(NamedTuple):
+    """One consistent version of the loaded data.
+
+    A snapshot is never modified after it is published. Readers pin one with current() and use it for
+    the whole operation; refreshes build the next snapshot separately and publish() swaps it in.
+    """
+
+    version: int
+    loaded_at: datetime.datetime | None
+    data: pd.DataFrame
+    date_index: dict
+    schedule_dict: dict
+    grid: TimeGrid
+    catalog: Catalog
+
+
+snapshot: Snapshot = Snapshot(0, None, pd.DataFrame(), {}, {}, grid, empty_catalog())
+_publish_lock = threading.Lock()
+
+
+def current() -> Snapshot:
+    """Return the latest published snapshot without locking."""
+
+    return snapshot
+
+
+def publish(data: pd.DataFrame, schedule_dict: dict, date_index: dict, grid: TimeGrid,
+            catalog: Catalog) -> Snapshot:
+    """Atomically replace the published snapshot and return it."""
+
+    global snapshot
+
+    # Only writers serialize, so that version stamps stay unique
+    with _publish_lock:
+        snapshot = Snapshot(snapshot.version + 1, datetime.datetime.now(), data, date_index, schedule_dict,
+                            grid, catalog)
+        return snapshot
+
+
+def __getattr__(name: str):
+    # config.data and config.schedule_dict read through to the published snapshot
+    if name in ('data', 'schedule_dict'):
+        return getattr(snapshot, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
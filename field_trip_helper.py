@@ -1,6 +1,5 @@
 # Standard packages
 import datetime
-import itertools
 import math
 
 # Third-party packages
@@ -12,8 +11,21 @@ import requests
 import seaborn as sb
 
 # Project packages
+import analytics as fth_analytics
+import catalog as fth_catalog
 import config
 import interface as fth_interface
+from schedule_client import ScheduleClient
+import schedule_svg as fth_svg
+from timegrid import TimeGrid
+
+# Public programs that occupy rooms every day, as (location, start, duration, label)
+PUBLIC_SHOWS = [
+    ("Eureka Theater", 12.5, .5, "Live Science"),
+    ("Sudekum Planetarium", 11.5, .5, "Public Show"),
+    ("Sudekum Planetarium", 13.25, .5, "Public Show"),
+    ("Sudekum Planetarium", 14.25, .5, "Public Show"),
+]
 
 
 def initialize():
@@ -22,13 +34,27 @@ def initialize():
     fth_interface.pw_submit_button.on_click(login)
     fth_interface.browse_select_date_button.on_click(generate_schedule_from_browser)
     fth_interface.find_search.on_click(search_from_browser)
+    fth_interface.season_show_button.on_click(season_from_browser)
     display(HTML("<H1>ASC Field Trip Helper</H1>"))
     display(fth_interface.login_output)
     display(fth_interface.main_output)
+    if service_client() is not None:
+        # The shared service already holds the data, so there is nothing to log in to
+        with fth_interface.main_output:
+            display(fth_interface.interface)
+        return
     with fth_interface.login_output:
         display(fth_interface.pw_login_box)
 
 
+def service_client() -> ScheduleClient | None:
+    """Return a client for the shared schedule service when config.service_url is set."""
+
+    if not config.service_url:
+        return None
+    return ScheduleClient(config.service_url)
+
+
 def login(*args):
     """Get the username and password from the login fields and retrieve the data."""
 
@@ -38,6 +64,8 @@ def login(*args):
     fth_interface.pw_status.value = "Loading..."
 
     retrieve_data()
+    snapshot = config.current()
+    show_audit(*audit_bookings(snapshot.data, snapshot.grid), snapshot.grid)
     with fth_interface.main_output:
         display(fth_interface.interface)
 
@@ -52,23 +80,37 @@ def retrieve_data():
 
     r = session.get(url)
 
-    config.data = pd.DataFrame(r.json()['value'])
+    # Build the next snapshot off to the side; readers keep the old one until it is published
+    data = pd.DataFrame(r.json()['value'])
 
-    config.data["Arrival"] = pd.to_datetime(config.data["Arrival"])
-    config.data["Departure"] = pd.to_datetime(config.data["Departure"])
+    data["Arrival"] = pd.to_datetime(data["Arrival"])
+    data["Departure"] = pd.to_datetime(data["Departure"])
 
-    config.data["Start time"] = config.data.apply(create_start_time, axis=1)
-    config.data["End time"] = config.data.apply(create_end_time, axis=1)
-    config.data["Ticket type"] = config.data["Tickettype"]
+    data["Start time"] = data.apply(create_start_time, axis=1)
+    data["End time"] = data.apply(create_end_time, axis=1)
+    data["Ticket type"] = data["Tickettype"]
 
-    config.data = config.data[
+    data = data[
         ["Name", "Arrival", "Departure", "Program", "Category", "Location", "Ticket type", "Quantity", "Capacity",
          "Start time", "End time", "Address"]]
 
-    build_search_schedule()
+    catalog = fth_catalog.build_catalog(data)
+    data = fth_catalog.add_ids(data, catalog)
+
+    grid = config.grid
+    config.publish(data, build_search_schedule(data, grid, catalog), build_date_index(data), grid, catalog)
     fth_interface.login_output.clear_output()
 
 
+def build_date_index(df: pd.DataFrame) -> dict:
+    """Return a dict of arrival date to the row positions on that date."""
+
+    if len(df) == 0:
+        return {}
+
+    return df.groupby(df.Arrival.dt.date).indices
+
+
 def create_start_time(row: pd.Series) -> pd.Timestamp | None:
     date = row["Arrival"]
     if row.Starttime is None:
@@ -92,6 +134,11 @@ def get_date(df: pd.DataFrame, date: str | datetime.date) -> pd.DataFrame:
         split = date.split('-')
         date = datetime.datetime(int(split[0]), int(split[1]), int(split[2])).date()
 
+    snapshot = config.current()
+    if df is snapshot.data:
+        # Use the precomputed index instead of scanning every row
+        return df.iloc[snapshot.date_index.get(pd.Timestamp(date).date(), [])]
+
     return df[df.Arrival.dt.date == pd.Timestamp(date).date()]
 
 
@@ -169,37 +216,7 @@ def decimal_time(date) -> float:
 def format_name(name: str, single_line: bool = False) -> str:
     """Format the name of a given program."""
 
-    result = name
-    if name == 'SCH - L - Amusement Park Physics STEM Lab':
-        result = "Amusement\nPark Physics"
-    if name == 'SCH - L - Squid Dissection STEM Lab':
-        result = "Squid\nDissection"
-    if name == 'SCH - D - Matter Matters':
-        result = "Matter Matters"
-    if name == 'PS - School Shows':
-        result = "School Show"
-    if name == 'SCH - D - Cooking Up a Storm':
-        result = "Cooking Up\na Storm"
-    if name == 'SCH - L - Cow Eye Dissection STEM Lab':
-        result = "Cow Eye\nDissection"
-    if name == 'SCH - D - Get Energized!':
-        result = 'Get Energized!'
-    if name == 'PS - To Worlds Beyond':
-        result = 'To Worlds\nBeyond'
-    if name == 'SCH - L - Splitting Molecules STEM Lab':
-        result = 'Splitting\nMolecules'
-    if name == 'SCH - D - Space Exploration':
-        result = 'Space\nExploration'
-    if name == 'SCH - L - Fetal Pig STEM Lab':
-        result = 'Fetal Pig\nDissection'
-    if name == 'PS - Nightwatch':
-        result = 'Nightwatch'
-    if name == 'SCH - D - Chemistry is a Blast!':
-        result = 'Chemistry\nis a Blast'
-    if name == "SCH - D - Shocking, It's Science!":
-        result = "Shocking,\nIt's Science!"
-    if name == "SCH - D - Get Fired Up!":
-        result = 'Get Fired Up!'
+    result = fth_catalog.PROGRAM_LABELS.get(name, name)
 
     if single_line is True:
         # Remove the line breaks
@@ -211,7 +228,8 @@ def get_school_color(name_colors: dict, name: str):
     """Return a color for each unique school name"""
 
     if name not in name_colors:
-        name_colors[name] = sb.color_palette("pastel", n_colors=10)[len(name_colors)]
+        # Reuse colors once a day has more schools than the palette
+        name_colors[name] = fth_catalog.SCHOOL_PALETTE[len(name_colors) % len(fth_catalog.SCHOOL_PALETTE)]
 
     return name_colors[name]
 
@@ -226,19 +244,40 @@ def check_legend(legend_names: dict[str, bool], name: str) -> str | None:
     return name
 
 
+def schedule_bookings(day: pd.DataFrame, catalog: fth_catalog.Catalog) -> list[tuple[str, int, float, float, str]]:
+    """Return the bookings of a day to draw on the schedule.
+
+    Schools booked into the same program at the same time are summed. Each booking is a
+    (school, location ID, start, end, label) tuple, with decimal times; bookings with a missing name or
+    at a location without a schedule column are left out.
+    """
+
+    combo = day.groupby(["School ID", "Program ID", "Location ID", "Start time", "End time", "Capacity"]).sum(
+        numeric_only=True).reset_index()
+
+    bookings = []
+    for school, program, location, start_time, end_time, capacity, quantity in zip(
+            combo["School ID"], combo["Program ID"], combo["Location ID"], combo["Start time"], combo["End time"],
+            combo.Capacity, combo.Quantity):
+        if school < 0 or program < 0 or location < 0:
+            # -1 marks a missing name, which would otherwise index the last entry of the catalog
+            continue
+        if location >= len(fth_catalog.LOCATIONS):
+            # Only the fixed locations have a column on the schedule
+            continue
+
+        bookings.append((catalog.schools.names[school], location, decimal_time(start_time), decimal_time(end_time),
+                         catalog.programs.labels[program] + "\n(" + str(quantity) + "/" + str(capacity) + ")"))
+    return bookings
+
+
 def generate_schedule_image(date):
     """Generate a schedule image and return it."""
 
-    locations = {
-        "Jack Wood Hall": 1,
-        "Eureka Theater": 2,
-        "Learning Lab": 3,
-        "Green Classroom": 4,
-        "Yellow Classroom": 5,
-        "Sudekum Planetarium": 6
-    }
-
-    day = get_date(config.data, date)
+    snapshot = config.current()
+    catalog = snapshot.catalog
+    grid = snapshot.grid
+    day = get_date(snapshot.data, date)
 
     if len(day) == 0:
         return
@@ -247,46 +286,29 @@ def generate_schedule_image(date):
     legend_names = {}
 
     plt.clf()
-    combo = day.groupby(["Name", "Program", "Location", "Start time", "End time", "Capacity"]).sum(
-        numeric_only=True).reset_index()
     n_groups, n_visitors = get_admission(day, date)
 
-    for i, row in combo.iterrows():
-        if row.Location is None:
-            continue
-
-        start = decimal_time(row["Start time"])
-        end = decimal_time(row["End time"])
-        duration = end - start
-        plt.bar(locations[row.Location], duration, bottom=start, label=check_legend(legend_names, row.Name),
-                color=get_school_color(name_colors, row.Name), zorder=10)
-        plt.text(locations[row.Location], (start + end) / 2,
-                 format_name(row.Program) + "\n(" + str(row.Quantity) + "/" + str(row.Capacity) + ")", ha='center',
-                 va='center', zorder=20)
+    for school, location, start, end, label in schedule_bookings(day, catalog):
+        # Location IDs follow the column order
+        plt.bar(location + 1, end - start, bottom=start, label=check_legend(legend_names, school),
+                color=get_school_color(name_colors, school), zorder=10)
+        plt.text(location + 1, (start + end) / 2, label, ha='center', va='center', zorder=20)
 
     # Add public shows
-    plt.bar(2, .5, bottom=12.5, color=(0.5, 0.5, 0.5), zorder=10)
-    plt.text(2, 12.75, "Live Science", ha='center', va='center', wrap=True, color='white', zorder=20)
-
-    plt.bar(6, .5, bottom=11.5, color=(0.5, 0.5, 0.5), zorder=10)
-    plt.text(6, 11.75, "Public Show", ha='center', va='center', wrap=True, color='white', zorder=20)
-
-    plt.bar(6, .5, bottom=13.25, color=(0.5, 0.5, 0.5), zorder=10)
-    plt.text(6, 13.5, "Public Show", ha='center', va='center', wrap=True, color='white', zorder=20)
-
-    plt.bar(6, .5, bottom=14.25, color=(0.5, 0.5, 0.5), zorder=10)
-    plt.text(6, 14.5, "Public Show", ha='center', va='center', wrap=True, color='white', zorder=20)
+    for location, start, duration, label in PUBLIC_SHOWS:
+        column = fth_catalog.LOCATION_COLUMNS[location]
+        plt.bar(column, duration, bottom=start, color=(0.5, 0.5, 0.5), zorder=10)
+        plt.text(column, start + duration / 2, label, ha='center', va='center', wrap=True,
+                 color='white', zorder=20)
 
     plt.legend(bbox_to_anchor=(0.5, -0.2), loc='lower center', ncol=2)
 
     plt.title(str(np.min(day.Arrival.dt.date)) + f" (Groups: {n_groups}, Visitors: {n_visitors})", fontsize=20)
-    plt.gca().invert_yaxis()
-    plt.yticks([9, 9.5, 10, 10.5, 11, 11.5, 12, 12.5, 13, 13.5, 14, 14.5, 15],
-               ["9 AM", "9:30 AM", "10 AM", "10:30 AM", "11 AM", "11:30 AM", "12 PM", "12:30 PM", "1 PM", "1:30 PM",
-                "2 PM", "2:30 PM", "3 PM"])
-    plt.xticks([1, 2, 3, 4, 5, 6],
-               ["Jack Wood\nHall", "Eureka\nTheater", "Learning\nLab", "Green\nClassroom", "Yellow\nClassroom",
-                "Sudekum\nPlanetarium"])
+    # Operating hours of the grid, earliest at the top
+    plt.ylim(grid.close_minute / 60, grid.open_minute / 60)
+    plt.yticks(*fth_svg.hour_ticks(grid))
+    plt.xticks([fth_catalog.LOCATION_COLUMNS[location] for location in fth_catalog.LOCATIONS],
+               [fth_catalog.LOCATION_LABELS[location] for location in fth_catalog.LOCATIONS])
     plt.grid(which='major', axis='y', zorder=1)
     plt.gca().tick_params(right=True, top=True, labelright=True, labeltop=True, rotation=0)
 
@@ -298,38 +320,62 @@ def generate_schedule_image(date):
     # plt.savefig('schedules/' + str(date) + '.pdf', dpi=300)
 
 
-def reset_search_schedule():
-    """Rebuild the base schedule with no entries"""
+def generate_schedule_svg(date):
+    """Generate the same schedule as generate_schedule_image() as an SVG, without matplotlib."""
+
+    snapshot = config.current()
+    catalog = snapshot.catalog
+    day = get_date(snapshot.data, date)
+
+    if len(day) == 0:
+        return
+
+    name_colors = {}
+    legend = []
+    blocks = []
+
+    n_groups, n_visitors = get_admission(day, date)
+
+    for school, location, start, end, label in schedule_bookings(day, catalog):
+        if school not in name_colors:
+            legend.append((school, get_school_color(name_colors, school)))
+        blocks.append((catalog.locations.names[location], start, end, label, name_colors[school], 'black'))
+
+    for location, start, duration, label in PUBLIC_SHOWS:
+        blocks.append((location, start, start + duration, label, (0.5, 0.5, 0.5), 'white'))
+
+    title = str(np.min(day.Arrival.dt.date)) + f" (Groups: {n_groups}, Visitors: {n_visitors})"
+    return fth_svg.schedule_html(title, blocks, legend, snapshot.grid)
 
-    config.schedule_dict = {}
+
+def render_schedule(date):
+    """Render the schedule for a date with the backend selected in config.renderer."""
+
+    client = service_client()
+    if client is not None:
+        return HTML(client.schedule_svg(date))
+    if config.renderer == 'svg':
+        return generate_schedule_svg(date)
+    return generate_schedule_image(date)
+
+
+def reset_search_schedule(data: pd.DataFrame, grid: TimeGrid) -> dict:
+    """Return a new base schedule with no entries
+
+    Each location's day is an int bitmask of booked slots on the grid.
+    """
+
+    schedule_dict = {}
 
     today = datetime.datetime.now().date()
     next_year = today + pd.Timedelta('365 d')
 
-    day_dict = {9: False, 9.25: False, 9.5: False, 9.75: False,
-                10: False, 10.25: False, 10.5: False, 10.75: False,
-                11: False, 11.25: False, 11.5: False, 11.75: False,
-                12: False, 12.25: False, 12.5: False, 12.75: False,
-                13: False, 13.25: False, 13.5: False, 13.75: False,
-                14: False, 14.25: False, 14.5: False, 14.75: False}
-    jwh_dict = {9: True, 9.25: True, 9.5: True, 9.75: True,
-                10: False, 10.25: False, 10.5: False, 10.75: False,
-                11: False, 11.25: False, 11.5: False, 11.75: False,
-                12: False, 12.25: False, 12.5: False, 12.75: False,
-                13: False, 13.25: False, 13.5: False, 13.75: False,
-                14: True, 14.25: True, 14.5: True, 14.75: True}
-    eureka_dict = {9: False, 9.25: False, 9.5: False, 9.75: False,
-                   10: False, 10.25: False, 10.5: False, 10.75: False,
-                   11: False, 11.25: False, 11.5: False, 11.75: False,
-                   12: False, 12.25: True, 12.5: True, 12.75: True,
-                   13: False, 13.25: False, 13.5: False, 13.75: False,
-                   14: False, 14.25: False, 14.5: False, 14.75: False}
-    planet_dict = {9: False, 9.25: False, 9.5: False, 9.75: False,
-                   10: False, 10.25: False, 10.5: False, 10.75: False,
-                   11: False, 11.25: False, 11.5: True, 11.75: True,
-                   12: True, 12.25: True, 12.5: False, 12.75: False,
-                   13: True, 13.25: True, 13.5: True, 13.75: True,
-                   14: True, 14.25: True, 14.5: True, 14.75: True}
+    day_mask = 0
+    jwh_mask = grid.mask(9, 10) | grid.mask(14, 15)
+    eureka_mask = grid.mask(12.25, 13)
+    planet_mask = grid.mask(11.5, 12.5) | grid.mask(13, 15)
+    # Locations with standing blocks; the rest start the day free
+    blocked = {'Jack Wood Hall': jwh_mask, "Eureka Theater": eureka_mask, "Sudekum Planetarium": planet_mask}
 
     for date in pd.date_range(today, next_year):
         if date.weekday() not in [0, 3, 4]:
@@ -340,46 +386,136 @@ def reset_search_schedule():
             continue
 
         date_str = str(date.date())
-        admission = get_admission(config.data, date.date())
-        config.schedule_dict[date_str] = {
-            'Admission': {'groups': admission[0], 'quantity': admission[1]},
-            'Jack Wood Hall': jwh_dict.copy(),
-            "Eureka Theater": eureka_dict.copy(),
-            "Learning Lab": day_dict.copy(),
-            "Green Classroom": day_dict.copy(),
-            "Yellow Classroom": day_dict.copy(),
-            "Sudekum Planetarium": planet_dict.copy()
-        }
+        admission = get_admission(data, date.date())
+        schedule_dict[date_str] = {'Admission': {'groups': admission[0], 'quantity': admission[1]}}
+        for location in fth_catalog.LOCATIONS:
+            schedule_dict[date_str][location] = blocked.get(location, day_mask)
 
+    return schedule_dict
 
-def build_search_schedule():
-    """From the data, build a dict representing the daily schedule"""
 
-    reset_search_schedule()
+def build_search_schedule(data: pd.DataFrame, grid: TimeGrid = None, catalog: fth_catalog.Catalog = None) -> dict:
+    """From the data, build a new dict representing the daily schedule"""
 
-    for i, row in config.data.iterrows():
-        if row.Location is None or row.Location == 'Admission':
-            continue
+    if grid is None:
+        grid = config.grid
+    if catalog is None:
+        catalog = fth_catalog.build_catalog(data)
+        data = fth_catalog.add_ids(data, catalog)
+    schedule_dict = reset_search_schedule(data, grid)
 
-        date = str(row.Arrival.date())
-        if date not in config.schedule_dict:
+    # The fixed locations come first in the catalog, so this also leaves out Admission
+    bookings = data[(data["Location ID"] >= 0) & (data["Location ID"] < len(fth_catalog.LOCATIONS)) &
+                    data["Start time"].notna() & data["End time"].notna()]
+    dates = bookings.Arrival.dt.strftime('%Y-%m-%d')
+
+    for date, location, start_time, end_time in zip(dates, bookings["Location ID"], bookings["Start time"],
+                                                     bookings["End time"]):
+        if date not in schedule_dict:
             continue
 
-        start_time = decimal_time(row['Start time'].time())
-        end_time = decimal_time(row['End time'].time())
-        # Iterate the schedule in the given date/location and block matching times
-        for slot in config.schedule_dict[date][row.Location]:
-            if start_time <= slot < end_time:
-                config.schedule_dict[date][row.Location][slot] = True
+        # Block every slot the booking overlaps, including partly covered slots
+        schedule_dict[date][catalog.locations.names[location]] |= grid.mask(start_time, end_time)
+
+    return schedule_dict
+
+
+def audit_bookings(df: pd.DataFrame, grid: TimeGrid = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Find double bookings and bookings outside the operating hours.
+
+    Bookings are sorted by location and start time and swept once, keeping the bookings that are still
+    running at each start. Return a DataFrame of overlapping pairs and a DataFrame of bookings that
+    start before or end after the operating hours of grid (by default the published snapshot's). Pairs
+    of the same program at the same time are marked as shared, since several schools can attend one
+    session.
+    """
+
+    if grid is None:
+        grid = config.current().grid
+
+    bookings = df[df.Location.notna() & (df.Location != 'Admission') &
+                  df["Start time"].notna() & df["End time"].notna()]
+    bookings = (bookings.groupby(["Name", "Program", "Location", "Start time", "End time"])
+                .sum(numeric_only=True).reset_index()
+                .sort_values(["Location", "Start time"], kind='stable').reset_index(drop=True))
+
+    locations = bookings.Location.to_numpy()
+    starts = bookings["Start time"].to_numpy()
+    ends = bookings["End time"].to_numpy()
+    days = bookings["Start time"].dt.normalize().to_numpy()
+
+    pairs = []
+    active = []
+    for i in range(len(bookings)):
+        if i == 0 or locations[i] != locations[i - 1] or days[i] != days[i - 1]:
+            # New date/location, nothing is running yet
+            active = []
+        active = [j for j in active if ends[j] > starts[i]]
+        for j in active:
+            pairs.append((j, i))
+        active.append(i)
+
+    first = bookings.iloc[[j for j, _ in pairs]].reset_index(drop=True)
+    second = bookings.iloc[[i for _, i in pairs]].reset_index(drop=True)
+    conflicts = pd.DataFrame({
+        "Date": first["Start time"].dt.date,
+        "Location": first.Location,
+        "Name": first.Name,
+        "Program": first.Program,
+        "Start time": first["Start time"],
+        "End time": first["End time"],
+        "Other name": second.Name,
+        "Other program": second.Program,
+        "Other start time": second["Start time"],
+        "Other end time": second["End time"],
+        "Shared": ((first.Program == second.Program) & (first["Start time"] == second["Start time"]) &
+                   (first["End time"] == second["End time"])),
+    })
+
+    start = bookings["Start time"].dt.hour * 60 + bookings["Start time"].dt.minute
+    end = bookings["End time"].dt.hour * 60 + bookings["End time"].dt.minute
+    outside = bookings[(start < grid.open_minute) | (end > grid.close_minute)].reset_index(drop=True)
+
+    return conflicts, outside
+
+
+def show_audit(conflicts: pd.DataFrame, outside: pd.DataFrame, grid: TimeGrid):
+    """Show the conflict summary from audit_bookings() in the interface."""
+
+    double_booked = conflicts[~conflicts.Shared]
+    fth_interface.audit_output.clear_output()
+    with fth_interface.audit_output:
+        display(HTML(f"<b>{len(double_booked)}</b> double bookings, "
+                     f"<b>{len(conflicts) - len(double_booked)}</b> shared sessions, "
+                     f"<b>{len(outside)}</b> bookings outside {time_labels([grid.open_minute / 60])[0]}"
+                     f"&ndash;{time_labels([grid.close_minute / 60])[0]}"))
+        if len(double_booked) > 0:
+            display(double_booked.drop(columns="Shared"))
+        if len(outside) > 0:
+            display(outside[["Name", "Program", "Location", "Start time", "End time"]])
+
+
+def pin_schedule(schedule_dict: dict = None) -> tuple[dict, TimeGrid]:
+    """Return the schedule to search and its grid, both read from one published snapshot.
+
+    A holds.HoldLayer carries the grid it was built on, so it is used instead of the snapshot's.
+    """
+
+    snapshot = config.current()
+    if schedule_dict is None:
+        return snapshot.schedule_dict, snapshot.grid
+    return schedule_dict, getattr(schedule_dict, 'grid', snapshot.grid)
 
 
-def search_admission(number: int) -> dict:
+def search_admission(number: int, schedule_dict: dict = None) -> dict:
     """Search the schedule for dates that have capacity for the given number."""
 
+    if schedule_dict is None:
+        schedule_dict = config.current().schedule_dict
     results = {}
 
-    for date in config.schedule_dict:
-        admission = config.schedule_dict[date]['Admission']
+    for date in schedule_dict:
+        admission = schedule_dict[date]['Admission']
 
         if (6 - admission['groups']) > 0 and (600 - admission['quantity']) >= number:
             results[date] = True
@@ -387,30 +523,27 @@ def search_admission(number: int) -> dict:
     return results
 
 
-def search_schedule(location: str, duration: float, start_time: float = 9, end_time: float = 14) -> dict:
+def search_schedule(location: str, duration: float, start_time: float = 9, end_time: float = 14,
+                    schedule_dict: dict = None, grid: TimeGrid = None) -> dict:
     """Search the schedule for gaps matching the given location and duration."""
+
+    schedule_dict, schedule_grid = pin_schedule(schedule_dict)
+    if grid is None:
+        grid = schedule_grid
     results = {}
 
-    for date in config.schedule_dict:
-        loc_schedule = config.schedule_dict[date][location]
-        # Find the available gaps
-        for slot in loc_schedule:
-            if loc_schedule[slot] is True:
-                # This slot is full
-                continue
-            if slot < start_time or slot >= end_time:
-                # This time is outside their visit
-                continue
-            i = 0
-            gap = 0
-            while slot + i * 0.25 in loc_schedule and loc_schedule[
-                slot + i * 0.25] is False and slot + i * 0.25 < end_time:
-                gap += 0.25
-                i += 1
-            if gap >= duration:
+    # Slots that begin during their visit
+    window = grid.window(start_time, end_time)
+    needed = grid.slot_count(duration)
+
+    for date in schedule_dict:
+        free = ~schedule_dict[date][location] & window
+        # Every slot in a free run can start the program if enough of the run is left
+        for first, length in grid.runs(free):
+            for slot in range(first, first + length - needed + 1):
                 if date not in results:
                     results[date] = {location: {}}
-                results[date][location][slot] = gap
+                results[date][location][grid.time(slot)] = (first + length - slot) * grid.resolution / 60
     return results
 
 
@@ -419,8 +552,12 @@ def combo_search(criteria: list[tuple[str, float]],
                  start_date=None,
                  end_date=None,
                  start_time: float = 9,
-                 end_time: float = 14) -> dict:
-    """Search the schedule for multiple criteria, given by (location, duration)."""
+                 end_time: float = 14,
+                 schedule_dict: dict = None) -> dict:
+    """Search the schedule for multiple criteria, given by (location, duration).
+
+    Pass a holds.HoldLayer as schedule_dict to search the schedule with tentative holds.
+    """
 
     if isinstance(start_date, str):
         split = start_date.split('-')
@@ -429,6 +566,8 @@ def combo_search(criteria: list[tuple[str, float]],
         split = end_date.split('-')
         end_date = datetime.datetime(int(split[0]), int(split[1]), int(split[2])).date()
 
+    # Pin one snapshot so every sub-search sees the same schedule
+    schedule_dict, grid = pin_schedule(schedule_dict)
     combo_results = {}
 
     i = 0
@@ -437,11 +576,12 @@ def combo_search(criteria: list[tuple[str, float]],
     for criterion in criteria:
         if criterion[0] != 'Admission':
             criteria_dict[criterion[0]] = criterion[1]
-            combo_results[i] = search_schedule(criterion[0], criterion[1], start_time=start_time, end_time=end_time)
+            combo_results[i] = search_schedule(criterion[0], criterion[1], start_time=start_time, end_time=end_time,
+                                               schedule_dict=schedule_dict, grid=grid)
             i += 1
         else:
             group_size = criterion[1]
-    admission_match = search_admission(group_size)
+    admission_match = search_admission(group_size, schedule_dict=schedule_dict)
 
     if len(combo_results) == 0:
         # Bail out without anything to match
@@ -478,67 +618,185 @@ def combo_search(criteria: list[tuple[str, float]],
             subdict[location] = {'duration': criteria_dict[location], 'options': options}
         jigsaw_dict[date] = subdict
 
-    output_dict = jigsaw_schedule(jigsaw_dict)
+    output_dict = jigsaw_schedule(jigsaw_dict, grid)
 
     # Cut down the dictionary to the given number of elements.
     return {k: output_dict[k] for k, _ in zip(output_dict, range(number))}
 
 
-def jigsaw_schedule(options_dict: dict) -> dict:
-    """Brute force a series of schedule options to find a set that matches."""
+def jigsaw_schedule(options_dict: dict, grid: TimeGrid = None) -> dict:
+    """Find, for each date, a start for every location where none of the programs overlap.
+
+    A depth-first search places one location at a time on the slots still free, so a clash prunes
+    every combination below it, and a (location, used slots) state that failed once is not searched
+    again. The match is the first in option order, as a full search of the combinations would find.
+    """
 
+    if grid is None:
+        grid = config.current().grid
     result_dict = {}
-    slots_template = {9: False, 9.25: False, 9.5: False, 9.75: False,
-                      10: False, 10.25: False, 10.5: False, 10.75: False,
-                      11: False, 11.25: False, 11.5: False, 11.75: False,
-                      12: False, 12.25: False, 12.5: False, 12.75: False,
-                      13: False, 13.25: False, 13.5: False, 13.75: False,
-                      14: False, 14.25: False, 14.5: False, 14.75: False}
 
     for date in options_dict:
         locations = options_dict[date]
         option_lists = []
         for location in locations:
-            location_options = []
             duration = locations[location]["duration"]
-            options = locations[location]["options"]
-            for option in options:
-                location_options.append((location, option, duration))
-            option_lists.append(location_options)
-        permutations = list(itertools.product(*option_lists))
-        match = None
-        for perm in permutations:
-            slots = slots_template.copy()
-            error = False
-            for item in perm:
-                location, start, duration = item
-                for slot in slots:
-                    if slot >= start and slot < start + duration:
-                        if slots[slot] is True:
-                            error = True
-                        else:
-                            slots[slot] = True
-            if error is False:
-                match = perm
-                break
+            option_lists.append([((location, option, duration), grid.mask(option, option + duration))
+                                 for option in locations[location]["options"]])
+        failed = set()
+
+        def place(level: int, used: int) -> tuple | None:
+            if level == len(option_lists):
+                return ()
+            if (level, used) in failed:
+                return None
+            for item, mask in option_lists[level]:
+                # The group can only be in one place at a time, so the slot masks must not overlap
+                if used & mask:
+                    continue
+                rest = place(level + 1, used | mask)
+                if rest is not None:
+                    return (item,) + rest
+            failed.add((level, used))
+            return None
+
+        match = place(0, 0)
         if match is not None:
             result_dict[date] = match
     return result_dict
 
 
-def visualize_search_schedule(date, overlays: list[tuple] = []):
-    """Create a schedule graphic that shows the time slots available on a given day."""
+def free_runs(schedule_dict: dict, locations: list[str], grid: TimeGrid) -> dict:
+    """Return the free (first slot, length) runs for each location and date, scanning the schedule once."""
+
+    return {location: {date: list(grid.runs(~schedule_dict[date][location] & grid.full)) for date in schedule_dict}
+            for location in locations}
+
+
+def run_options(runs: list[tuple[int, int]], grid: TimeGrid, duration: float, start_time: float,
+                end_time: float) -> list[float]:
+    """Return the start times from precomputed free runs where duration fits during the visit."""
+
+    window = grid.window(start_time, end_time)
+    if window == 0:
+        return []
+    window_first = (window & -window).bit_length() - 1
+    window_last = window.bit_length()
+    needed = grid.slot_count(duration)
+
+    options = []
+    for first, length in runs:
+        for slot in range(max(first, window_first), min(first + length, window_last) - needed + 1):
+            options.append(grid.time(slot))
+    return options
+
+
+def suggest_alternatives(criteria: list[tuple[str, float]],
+                         start_date=None,
+                         end_date=None,
+                         start_time: float = 9,
+                         end_time: float = 14,
+                         top_k: int = 5,
+                         date_margin: int = 28,
+                         schedule_dict: dict = None) -> list[tuple[str, str, tuple | bool]]:
+    """Find the closest schedules to a combo_search() that has no exact match.
+
+    Each alternative relaxes one thing: a short instead of a long demo or lab, a visit window moved by
+    30 minutes, no lunch, or the nearest dates outside the range (up to date_margin days away). The
+    free gaps are computed once and shared by every variant. Return up to top_k
+    (description, date, match) tuples, most similar first, where match is as in combo_search().
+    """
+
+    if isinstance(start_date, str):
+        split = start_date.split('-')
+        start_date = datetime.datetime(int(split[0]), int(split[1]), int(split[2])).date()
+    if isinstance(end_date, str):
+        split = end_date.split('-')
+        end_date = datetime.datetime(int(split[0]), int(split[1]), int(split[2])).date()
+
+    schedule_dict, grid = pin_schedule(schedule_dict)
+
+    programs = [criterion for criterion in criteria if criterion[0] != 'Admission']
+    group_size = sum(criterion[1] for criterion in criteria if criterion[0] == 'Admission')
+    admission_match = search_admission(group_size, schedule_dict=schedule_dict)
+    runs = free_runs(schedule_dict, list({location for location, duration in programs}), grid)
+
+    def fit(date: str, variant: list[tuple[str, float]], variant_start: float, variant_end: float):
+        if date not in admission_match:
+            return None
+        subdict = {}
+        for location, duration in variant:
+            options = run_options(runs[location][date], grid, duration, variant_start, variant_end)
+            if len(options) == 0:
+                return None
+            subdict[location] = {'duration': duration, 'options': options}
+        if len(subdict) == 0:
+            return True
+        return jigsaw_schedule({date: subdict}, grid).get(date)
+
+    labels = {'Eureka Theater': 'demo', 'Learning Lab': 'lab'}
+    variants = []
+    for i, (location, duration) in enumerate(programs):
+        if location in labels and duration > 0.5:
+            variants.append((2, f"Short {labels[location]} instead of long",
+                             programs[:i] + [(location, 0.5)] + programs[i + 1:], start_time, end_time))
+        if location == 'Jack Wood Hall':
+            variants.append((3, "No lunch", programs[:i] + programs[i + 1:], start_time, end_time))
+    opening = grid.open_minute / 60
+    closing = grid.close_minute / 60
+    for description, start_shift, end_shift in [("Arrive 30 minutes earlier", -0.5, 0),
+                                                ("Depart 30 minutes later", 0, 0.5),
+                                                ("Visit 30 minutes earlier", -0.5, -0.5),
+                                                ("Visit 30 minutes later", 0.5, 0.5)]:
+        variant_start = start_time + start_shift
+        variant_end = end_time + end_shift
+        # Cutting a shifted end at opening or closing would narrow the window, not move it as labelled
+        if start_shift and not opening <= variant_start <= closing:
+            continue
+        if end_shift and not opening <= variant_end <= closing:
+            continue
+        if variant_start < variant_end:
+            variants.append((1, description, programs, variant_start, variant_end))
+
+    in_range = []
+    outside = []
+    for date in schedule_dict:
+        day = pd.to_datetime(date).date()
+        if start_date is not None and day < start_date:
+            outside.append(((start_date - day).days, "before", date))
+        elif end_date is not None and day > end_date:
+            outside.append(((day - end_date).days, "after", date))
+        else:
+            in_range.append(date)
+
+    alternatives = []
+    # Keep the earliest date for each relaxation
+    for cost, description, variant, variant_start, variant_end in variants:
+        for date in in_range:
+            match = fit(date, variant, variant_start, variant_end)
+            if match:
+                alternatives.append((cost, description, date, match))
+                break
+
+    # Keep the nearest date on each side of the range
+    found = set()
+    for days, side, date in sorted(outside):
+        if days > date_margin or side in found:
+            continue
+        match = fit(date, programs, start_time, end_time)
+        if match:
+            alternatives.append((1 + days / 7, f"{days} days {side} the requested dates", date, match))
+            found.add(side)
 
-    locations = {
-        "Jack Wood Hall": 1,
-        "Eureka Theater": 2,
-        "Learning Lab": 3,
-        "Green Classroom": 4,
-        "Yellow Classroom": 5,
-        "Sudekum Planetarium": 6
-    }
+    alternatives.sort(key=lambda alternative: (alternative[0], alternative[2]))
+    return [(description, date, match) for cost, description, date, match in alternatives[:top_k]]
 
-    day = config.schedule_dict[date]
+
+def visualize_search_schedule(date, overlays: list[tuple] = [], schedule_dict: dict = None):
+    """Create a schedule graphic that shows the time slots available on a given day."""
+
+    schedule_dict, grid = pin_schedule(schedule_dict)
+    day = schedule_dict[date]
 
     if len(day) == 0:
         return
@@ -546,23 +804,23 @@ def visualize_search_schedule(date, overlays: list[tuple] = []):
     plt.clf()
 
     for location in day:
-        for slot in day[location]:
-            if day[location][slot] is True:
-                plt.bar(locations[location], 0.25, bottom=slot, color=(0.5, 0.5, 0.5), zorder=10)
+        if location == 'Admission':
+            continue
+        for first, length in grid.runs(day[location]):
+            plt.bar(fth_catalog.LOCATION_COLUMNS[location], length * grid.resolution / 60, bottom=grid.time(first),
+                    color=(0.5, 0.5, 0.5), zorder=10)
 
     # Add overlays
     for overlay in overlays:
         location, start, duration = overlay
-        plt.bar(locations[location], duration, bottom=start, zorder=10)
+        plt.bar(fth_catalog.LOCATION_COLUMNS[location], duration, bottom=start, zorder=10)
 
     plt.title("Field Trip Availability: " + date, fontsize=20)
-    plt.gca().invert_yaxis()
-    plt.yticks([9, 9.5, 10, 10.5, 11, 11.5, 12, 12.5, 13, 13.5, 14, 14.5, 15],
-               ["9 AM", "9:30 AM", "10 AM", "10:30 AM", "11 AM", "11:30 AM", "12 PM", "12:30 PM", "1 PM", "1:30 PM",
-                "2 PM", "2:30 PM", "3 PM"])
-    plt.xticks([1, 2, 3, 4, 5, 6],
-               ["Jack Wood\nHall", "Eureka\nTheater", "Learning\nLab", "Green\nClassroom", "Yellow\nClassroom",
-                "Sudekum\nPlanetarium"])
+    # Operating hours of the grid, earliest at the top
+    plt.ylim(grid.close_minute / 60, grid.open_minute / 60)
+    plt.yticks(*fth_svg.hour_ticks(grid))
+    plt.xticks([fth_catalog.LOCATION_COLUMNS[location] for location in fth_catalog.LOCATIONS],
+               [fth_catalog.LOCATION_LABELS[location] for location in fth_catalog.LOCATIONS])
     plt.grid(which='major', axis='y', zorder=1)
     plt.gca().tick_params(right=True, top=True, labelright=True, labeltop=True, rotation=0)
 
@@ -574,13 +832,49 @@ def visualize_search_schedule(date, overlays: list[tuple] = []):
     return plt.gcf()
 
 
+def visualize_search_schedule_svg(date, overlays: list[tuple] = [], schedule_dict: dict = None):
+    """Create the availability graphic from visualize_search_schedule() as an SVG."""
+
+    schedule_dict, grid = pin_schedule(schedule_dict)
+    day = schedule_dict[date]
+
+    if len(day) == 0:
+        return
+
+    blocks = []
+    for location in day:
+        if location == 'Admission':
+            continue
+        for first, length in grid.runs(day[location]):
+            blocks.append((location, grid.time(first), grid.time(first + length), None, (0.5, 0.5, 0.5), 'black'))
+
+    # Add overlays, colored like matplotlib's default color cycle
+    palette = sb.color_palette()
+    for i, overlay in enumerate(overlays):
+        location, start, duration = overlay
+        blocks.append((location, start, start + duration, None, palette[i % len(palette)], 'black'))
+
+    return fth_svg.schedule_html("Field Trip Availability: " + date, blocks, grid=grid)
+
+
+def render_search_schedule(date, overlays: list[tuple] = [], schedule_dict: dict = None):
+    """Render the availability for a date with the backend selected in config.renderer."""
+
+    client = service_client()
+    if client is not None and schedule_dict is None:
+        return HTML(client.availability_svg(date, overlays))
+    if config.renderer == 'svg':
+        return visualize_search_schedule_svg(date, overlays, schedule_dict)
+    return visualize_search_schedule(date, overlays, schedule_dict)
+
+
 def generate_schedule_from_browser(*args):
     """Use the date from the date picker to create a schedule"""
     display(fth_interface.browse_date_picker.value)
 
     fth_interface.browse_output.clear_output()
     with fth_interface.browse_output:
-        display(generate_schedule_image(fth_interface.browse_date_picker.value))
+        display(render_schedule(fth_interface.browse_date_picker.value))
 
 
 def search_from_browser(*args):
@@ -615,18 +909,56 @@ def search_from_browser(*args):
     if fth_interface.find_misc_visitors.value > 0:
         criteria.append(('Admission', fth_interface.find_misc_visitors.value))
 
-    results = combo_search(criteria,
-                           start_date=start_date,
-                           end_date=end_date,
-                           start_time=start_time, end_time=end_time,
-                           number=1)
+    # Search the shared service when one is configured, otherwise the local data
+    client = service_client()
+    search = combo_search if client is None else client.combo_search
+    suggest = suggest_alternatives if client is None else client.suggest_alternatives
+
+    results = search(criteria,
+                     start_date=start_date,
+                     end_date=end_date,
+                     start_time=start_time, end_time=end_time,
+                     number=1)
     fth_interface.find_output.clear_output()
     with fth_interface.find_output:
         for date in results:
             overlays = results[date]
             if not isinstance(overlays, tuple):
                 overlays = []
-            display(visualize_search_schedule(date, overlays))
+            display(render_search_schedule(date, overlays))
+
+        if len(results) == 0:
+            alternatives = suggest(criteria,
+                                   start_date=start_date,
+                                   end_date=end_date,
+                                   start_time=start_time, end_time=end_time,
+                                   top_k=3)
+            if len(alternatives) == 0:
+                display(HTML("<b>No matching or nearby schedules.</b>"))
+            else:
+                display(HTML("<b>No exact match. Closest alternatives:</b>"))
+            for description, date, overlays in alternatives:
+                if not isinstance(overlays, tuple):
+                    overlays = []
+                display(HTML(f"<H3>{description}: {date}</H3>"))
+                display(render_search_schedule(date, overlays))
+
+
+def season_from_browser(*args):
+    """Show the season analytics view selected in the Season tab."""
+
+    view = fth_interface.season_view_picker.value
+
+    fth_interface.season_output.clear_output()
+    with fth_interface.season_output:
+        if service_client() is not None:
+            display(HTML("Season analytics need the data loaded in this notebook; clear config.service_url "
+                         "and log in to use them."))
+        elif view == 'admission':
+            display(fth_analytics.admission_heatmap())
+        else:
+            display(fth_analytics.utilization_heatmap(view))
+            display(fth_analytics.utilization().map('{:.0%}'.format).to_frame("Utilization"))
 
 
 def time_labels(times) -> list[str]:
@@ -649,20 +981,7 @@ def time_labels(times) -> list[str]:
 def get_event_color(name: str) -> tuple[float]:
     """Return a Seaborn color matching the given location/event."""
 
-    palette = sb.color_palette()
-    colors = {
-        'Arrival': palette[1],
-        'Departure': palette[3],
-        'Eureka Theater': palette[4],
-        'Green Classroom': palette[2],
-        'Jack Wood Hall': palette[7],
-        'Learning Lab': palette[5],
-        'Sudekum Planetarium': palette[0],
-        'Yellow Classroom': palette[8],
-    }
-    if name in colors:
-        return colors[name]
-    return palette[9]
+    return fth_catalog.EVENT_COLORS.get(name, fth_catalog.DEFAULT_EVENT_COLOR)
 
 
 # def get_event_text_color(name):
@@ -0,0 +1,111 @@
+# Standard packages
+from collections.abc import Mapping
+
+# Project packages
+import config
+from timegrid import TimeGrid
+
+
+class HoldLayer(Mapping):
+    """Tentative holds layered over a schedule without copying it.
+
+    A layer reads through to its base (the published schedule or another layer) and only copies the
+    day it writes to, so memory grows with the number of holds. Layers stack with push()
+    and are thrown away with discard(). Anything that takes a schedule_dict can search or render
+    "base + holds" by being given the layer, e.g. fth.combo_search(criteria, schedule_dict=layer).
+    """
+
+    def __init__(self, base: Mapping = None, grid: TimeGrid = None):
+        snapshot = config.current()
+        self.base = base if base is not None else snapshot.schedule_dict
+        if grid is None:
+            grid = base.grid if isinstance(base, HoldLayer) else snapshot.grid
+        self.grid = grid
+        self.days = {}
+        self.holds = []
+
+    def __getitem__(self, date) -> dict:
+        date = str(date)
+        if date in self.days:
+            return self.days[date]
+        return self.base[date]
+
+    def __iter__(self):
+        return iter(self.base)
+
+    def __len__(self) -> int:
+        return len(self.base)
+
+    def __contains__(self, date) -> bool:
+        return str(date) in self.base
+
+    def _writable(self, date: str) -> dict:
+        """Copy the day on first write. Location masks are ints, so only the admission dict is shared."""
+
+        if date not in self.base:
+            raise ValueError(f"{date} is not a field trip day in the schedule")
+        if date not in self.days:
+            day = dict(self.base[date])
+            day['Admission'] = day['Admission'].copy()
+            self.days[date] = day
+        return self.days[date]
+
+    def hold(self, date, location: str, start: float, duration: float, force: bool = False) -> bool:
+        """Block a location from start for duration hours.
+
+        If the hold overlaps something already booked or held, return False and leave the layer
+        unchanged, unless force is True.
+        """
+
+        date = str(date)
+        if date not in self.base:
+            raise ValueError(f"{date} is not a field trip day in the schedule")
+        mask = self.grid.mask(start, start + duration)
+        clear = not self[date][location] & mask
+        if not clear and not force:
+            return False
+
+        self._writable(date)[location] |= mask
+        self.holds.append((date, location, start, duration))
+        return clear
+
+    def hold_admission(self, date, visitors: int, force: bool = False) -> bool:
+        """Count a tentative group of visitors against the daily admission limits.
+
+        If the hold would go over 6 groups or 600 visitors, return False and leave the layer unchanged,
+        unless force is True.
+        """
+
+        date = str(date)
+        if date not in self.base:
+            raise ValueError(f"{date} is not a field trip day in the schedule")
+        admission = self[date]['Admission']
+        clear = admission['groups'] + 1 <= 6 and admission['quantity'] + visitors <= 600
+        if not clear and not force:
+            return False
+
+        admission = self._writable(date)['Admission']
+        admission['groups'] += 1
+        admission['quantity'] += visitors
+        self.holds.append((date, 'Admission', None, visitors))
+        return clear
+
+    def push(self) -> 'HoldLayer':
+        """Start a new layer of holds on top of this one."""
+
+        return HoldLayer(self)
+
+    def discard(self) -> Mapping:
+        """Drop this layer's holds and return the layer or schedule underneath."""
+
+        return self.base
+
+    def overlays(self, date) -> list[tuple]:
+        """Return the (location, start, duration) holds for a date from this and all lower layers."""
+
+        date = str(date)
+        result = self.base.overlays(date) if isinstance(self.base, HoldLayer) else []
+        for hold_date, location, start, duration in self.holds:
+            if hold_date == date and location != 'Admission':
+                result.append((location, start, duration))
+        return result
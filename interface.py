@@ -111,13 +111,28 @@ find_search = widgets.Button(description="Search")
 
 find_output = widgets.Output(layout={'border': '1px solid black'})
 
+audit_output = widgets.Output(layout={'border': '1px solid black'})
+
+season_view_picker = widgets.Dropdown(
+    options=[('Rooms by weekday', 'weekday'), ('Rooms by month', 'month'), ('Rooms by time of day', 'time'),
+             ('Admission load', 'admission')],
+    value='weekday',
+    description='View',
+)
+season_show_button = widgets.Button(description="Show")
+season_box = widgets.HBox([season_view_picker, season_show_button])
+
+season_output = widgets.Output(layout={'border': '1px solid black'})
+
 
 interface = widgets.Tab(layout=widgets.Layout(width="500px"))
 interface.children = [
      widgets.VBox([browse_date_box, browse_output]),
      widgets.VBox([group_search_box, group_search_output]),
-     widgets.VBox([find_datetime_box, find_programs_box, find_misc_box, find_search, find_output])
+     widgets.VBox([find_datetime_box, find_programs_box, find_misc_box, find_search, find_output]),
+     widgets.VBox([audit_output]),
+     widgets.VBox([season_box, season_output])
 ]
-interface.titles = ["Schedule browser", "Group finder", "Booking helper"]
+interface.titles = ["Schedule browser", "Group finder", "Booking helper", "Conflicts", "Season"]
 
 main_output = widgets.Output()
@@ -0,0 +1,70 @@
+# Standard packages
+import io
+import json
+import urllib.parse
+import urllib.request
+
+# Third-party packages
+import pandas as pd
+
+
+def frame_from_json(text: str) -> pd.DataFrame:
+    """Rebuild a reservation DataFrame from the service's JSON records."""
+
+    df = pd.read_json(io.StringIO(text), orient='records', convert_dates=False)
+    for column in ["Arrival", "Departure", "Start time", "End time"]:
+        if column in df:
+            df[column] = pd.to_datetime(df[column]).dt.tz_localize(None)
+    return df
+
+
+def match_from_json(match):
+    """JSON turns the matched (location, start, duration) tuples into lists; turn them back."""
+
+    if isinstance(match, list):
+        return tuple(tuple(item) for item in match)
+    return match
+
+
+class ScheduleClient:
+    """Thin client that mirrors the field_trip_helper query functions over HTTP.
+
+    Set config.service_url to have the notebook widgets use the shared service instead of logging in.
+    """
+
+    def __init__(self, base_url: str = 'http://127.0.0.1:8765', timeout: float = 30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, path: str, query: dict = None, body: dict = None) -> str:
+        url = self.base_url + path
+        if query:
+            url += '?' + urllib.parse.urlencode({k: v for k, v in query.items() if v is not None})
+        data = json.dumps(body, default=str).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.read().decode('utf-8')
+
+    def get_date(self, date) -> pd.DataFrame:
+        return frame_from_json(self._request('/date', {'date': str(date)}))
+
+    def get_name(self, name: str, date=None) -> list[pd.DataFrame]:
+        text = self._request('/name', {'name': name, 'date': None if date is None else str(date)})
+        return [frame_from_json(json.dumps(records)) for records in json.loads(text)]
+
+    def search_name(self, search: str) -> list[tuple[str, str]]:
+        return [tuple(match) for match in json.loads(self._request('/search_name', {'search': search}))]
+
+    def combo_search(self, criteria: list[tuple[str, float]], **options) -> dict:
+        results = json.loads(self._request('/combo_search', body={'criteria': criteria, **options}))
+        return {date: match_from_json(match) for date, match in results.items()}
+
+    def suggest_alternatives(self, criteria: list[tuple[str, float]], **options) -> list[tuple]:
+        results = json.loads(self._request('/suggest_alternatives', body={'criteria': criteria, **options}))
+        return [(description, date, match_from_json(match)) for description, date, match in results]
+
+    def schedule_svg(self, date) -> str:
+        return self._request('/schedule', {'date': str(date)})
+
+    def availability_svg(self, date, overlays: list[tuple] = []) -> str:
+        return self._request('/availability', {'date': str(date), 'overlays': json.dumps(overlays)})
@@ -0,0 +1,224 @@
+"""Local HTTP/JSON service that shares one copy of the schedule between many notebooks.
+
+Start the service once (it logs in and downloads the data a single time):
+
+    python schedule_service.py serve --port 8765
+
+Notebooks then act as thin clients: set config.service_url before fth.initialize() and the widgets
+query the service instead of logging in. schedule_client.ScheduleClient can also be used directly:
+
+    client = ScheduleClient('http://127.0.0.1:8765')
+    client.combo_search([('Learning Lab', 1)], start_date='2024-03-01')
+
+Measure throughput and latency with the bundled load generator:
+
+    python schedule_service.py bench --url http://127.0.0.1:8765/date?date=2024-03-07
+"""
+
+# Standard packages
+import argparse
+import concurrent.futures
+import datetime
+import getpass
+import json
+import os
+import time
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Third-party packages
+import numpy as np
+import pandas as pd
+
+# Project packages
+import config
+import field_trip_helper as fth
+
+
+def frame_to_json(df: pd.DataFrame) -> str:
+    """Serialize reservation entries as a JSON list of records."""
+
+    return df.to_json(orient='records', date_format='iso')
+
+
+def query_date(query: dict) -> str:
+    """Return the date parameter as 'YYYY-MM-DD', raising ValueError when it is not a date."""
+
+    return str(datetime.date.fromisoformat(query['date']))
+
+
+def handle_date(query: dict, body: dict) -> tuple[str, str]:
+    return 'application/json', frame_to_json(fth.get_date(config.data, query_date(query)))
+
+
+def handle_name(query: dict, body: dict) -> tuple[str, str]:
+    matches = fth.get_name(config.data, query['name'], date=query.get('date'))
+    return 'application/json', '[' + ','.join(frame_to_json(df) for df in matches) + ']'
+
+
+def handle_search_name(query: dict, body: dict) -> tuple[str, str]:
+    matches = fth.search_name(config.data, query['search'])
+    return 'application/json', json.dumps([(name, str(date)) for name, date in matches])
+
+
+def handle_combo_search(query: dict, body: dict) -> tuple[str, str]:
+    criteria = [tuple(criterion) for criterion in body['criteria']]
+    options = {key: body[key] for key in ['number', 'start_date', 'end_date', 'start_time', 'end_time']
+               if key in body}
+    return 'application/json', json.dumps(fth.combo_search(criteria, **options))
+
+
+def handle_suggest_alternatives(query: dict, body: dict) -> tuple[str, str]:
+    criteria = [tuple(criterion) for criterion in body['criteria']]
+    options = {key: body[key] for key in ['start_date', 'end_date', 'start_time', 'end_time', 'top_k', 'date_margin']
+               if key in body}
+    return 'application/json', json.dumps(fth.suggest_alternatives(criteria, **options))
+
+
+def handle_schedule(query: dict, body: dict) -> tuple[str, str]:
+    # matplotlib is not thread safe, so the service always renders with the SVG backend
+    html = fth.generate_schedule_svg(query_date(query))
+    return 'image/svg+xml', html.data if html is not None else ''
+
+
+def handle_availability(query: dict, body: dict) -> tuple[str, str]:
+    overlays = [tuple(overlay) for overlay in json.loads(query.get('overlays', '[]'))]
+    html = fth.visualize_search_schedule_svg(query_date(query), overlays)
+    return 'image/svg+xml', html.data if html is not None else ''
+
+
+ROUTES = {
+    '/date': handle_date,
+    '/name': handle_name,
+    '/search_name': handle_search_name,
+    '/combo_search': handle_combo_search,
+    '/suggest_alternatives': handle_suggest_alternatives,
+    '/schedule': handle_schedule,
+    '/availability': handle_availability,
+}
+
+
+class ScheduleServer(ThreadingHTTPServer):
+    """Threaded server with a listen backlog deep enough for many notebooks connecting at once.
+
+    The socketserver default queues only 5 pending connections, so bursts of clients were dropped and
+    had to retry after a second.
+    """
+
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class ScheduleRequestHandler(BaseHTTPRequestHandler):
+    """Dispatch GET/POST requests to the ROUTES table."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.dispatch(b'')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.dispatch(self.rfile.read(length))
+
+    def dispatch(self, raw_body: bytes):
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        if url.path not in ROUTES:
+            return self.respond(404, 'application/json', json.dumps({'error': 'Unknown endpoint ' + url.path}))
+        try:
+            # JSONDecodeError is a ValueError, so a malformed body is a 400 like any other bad input
+            body = json.loads(raw_body or b'{}')
+            if not isinstance(body, dict):
+                raise ValueError("The request body must be a JSON object")
+            content_type, payload = ROUTES[url.path](query, body)
+        except KeyError as e:
+            return self.respond(400, 'application/json', json.dumps({'error': 'Missing or unknown ' + str(e)}))
+        except ValueError as e:
+            return self.respond(400, 'application/json', json.dumps({'error': str(e)}))
+        except Exception as e:
+            return self.respond(500, 'application/json', json.dumps({'error': repr(e)}))
+        self.respond(200, content_type, payload)
+
+    def respond(self, status: int, content_type: str, payload: str):
+        data = payload.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Keep the console quiet under load
+        pass
+
+
+def serve(host: str = '127.0.0.1', port: int = 8765):
+    """Load the data once and answer requests from many clients on a thread per connection."""
+
+    fth.retrieve_data()
+    server = ScheduleServer((host, port), ScheduleRequestHandler)
+    print(f"Serving {len(config.data)} entries on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def benchmark(url: str, requests: int = 1000, concurrency: int = 16, body: dict = None) -> dict:
+    """Fire requests at url from concurrent clients and report requests per second and latency."""
+
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+
+    def timed_request(_):
+        start = time.perf_counter()
+        request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request) as response:
+            response.read()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = np.array(list(pool.map(timed_request, range(requests))))
+    elapsed = time.perf_counter() - start
+
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'rps': requests / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p95_ms': float(np.percentile(latencies, 95) * 1000),
+        'max_ms': float(latencies.max() * 1000),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared field trip schedule service")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help="Load the data and start the service")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+
+    bench_parser = commands.add_parser('bench', help="Run the load generator against a running service")
+    bench_parser.add_argument('--url', required=True)
+    bench_parser.add_argument('--requests', type=int, default=1000)
+    bench_parser.add_argument('--concurrency', type=int, default=16)
+    bench_parser.add_argument('--body', help="JSON body to POST, e.g. for /combo_search")
+
+    args = parser.parse_args()
+    if args.command == 'serve':
+        config.username = os.environ.get('ALTRU_USERNAME') or input('Username: ')
+        config.password = os.environ.get('ALTRU_PASSWORD') or getpass.getpass('Password: ')
+        serve(args.host, args.port)
+    else:
+        result = benchmark(args.url, args.requests, args.concurrency,
+                           json.loads(args.body) if args.body else None)
+        print(f"{result['requests']} requests, concurrency {result['concurrency']}: "
+              f"{result['rps']:.0f} req/s, p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+              f"max {result['max_ms']:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
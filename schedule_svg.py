@@ -0,0 +1,126 @@
+# Standard packages
+from html import escape
+
+# Third-party packages
+from IPython.display import HTML
+
+# Project packages
+from catalog import LOCATION_COLUMNS, LOCATION_LABELS, LOCATIONS
+from timegrid import TimeGrid
+
+
+# Canvas geometry in pixels, roughly a 10x8 inch figure at 100 dpi.
+WIDTH = 1000
+PLOT_LEFT = 90
+PLOT_RIGHT = 910
+PLOT_TOP = 110
+PLOT_BOTTOM = 660
+LEGEND_ROW_HEIGHT = 22
+FONT = "font-family:DejaVu Sans,Arial,sans-serif"
+
+
+def hex_color(color) -> str:
+    """Return a CSS color for a matplotlib-style RGB tuple or an existing CSS string."""
+
+    if isinstance(color, str):
+        return color
+
+    return '#' + ''.join(f"{round(min(max(c, 0), 1) * 255):02x}" for c in color[:3])
+
+
+def x_position(column: float) -> float:
+    """Return the pixel position for a location column (0.4 to 6.6 spans the plot)."""
+
+    return PLOT_LEFT + (column - 0.4) / 6.2 * (PLOT_RIGHT - PLOT_LEFT)
+
+
+def y_position(time: float, grid: TimeGrid) -> float:
+    """Return the pixel position for a decimal time (opening at the top, closing at the bottom)."""
+
+    opening = grid.open_minute / 60
+    return PLOT_TOP + (time - opening) / (grid.close_minute / 60 - opening) * (PLOT_BOTTOM - PLOT_TOP)
+
+
+def hour_ticks(grid: TimeGrid) -> tuple[list[float], list[str]]:
+    """Return the half hours across the grid's operating hours as decimal times and labels, i.e. '9:30 AM'."""
+
+    ticks = []
+    labels = []
+    for minute in range(-(-grid.open_minute // 30) * 30, grid.close_minute + 1, 30):
+        hour, rest = divmod(minute, 60)
+        ticks.append(minute / 60)
+        labels.append(f"{(hour - 1) % 12 + 1}{f':{rest:02d}' if rest else ''} {'AM' if hour < 12 else 'PM'}")
+    return ticks, labels
+
+
+def text_lines(x: float, y: float, text: str, size: int = 12, color: str = 'black', anchor: str = 'middle') -> str:
+    """Return an SVG text element with one tspan per line, vertically centred on y."""
+
+    lines = text.split('\n')
+    first = y - (len(lines) - 1) * size * 0.6
+    spans = ''.join(f'<tspan x="{x:.1f}" y="{first + i * size * 1.2:.1f}">{escape(line)}</tspan>'
+                    for i, line in enumerate(lines))
+    return (f'<text font-size="{size}" fill="{color}" text-anchor="{anchor}" dominant-baseline="central">'
+            f'{spans}</text>')
+
+
+def render_schedule(title: str, blocks: list[tuple], legend: list[tuple] = (), grid: TimeGrid = TimeGrid()) -> str:
+    """Return an SVG string of the location x operating hours day grid.
+
+    blocks is a list of (location, start, end, label, color, text_color) tuples, with decimal times,
+    and are cut to the operating hours of grid. legend is a list of (name, color) tuples shown in two
+    columns under the grid.
+    """
+
+    legend_rows = (len(legend) + 1) // 2
+    height = PLOT_BOTTOM + 70 + legend_rows * LEGEND_ROW_HEIGHT
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{WIDTH}" height="{height}" '
+             f'viewBox="0 0 {WIDTH} {height}" style="background:white;{FONT}">',
+             text_lines(WIDTH / 2, 30, title, size=20)]
+
+    # Grid lines and time labels on both sides
+    for tick, label in zip(*hour_ticks(grid)):
+        y = y_position(tick, grid)
+        parts.append(f'<line x1="{PLOT_LEFT}" x2="{PLOT_RIGHT}" y1="{y:.1f}" y2="{y:.1f}" stroke="#b0b0b0" '
+                     f'stroke-width="0.8"/>')
+        parts.append(text_lines(PLOT_LEFT - 6, y, label, size=11, anchor='end'))
+        parts.append(text_lines(PLOT_RIGHT + 6, y, label, size=11, anchor='start'))
+
+    # Location labels above and below the grid
+    for location in LOCATIONS:
+        x = x_position(LOCATION_COLUMNS[location])
+        parts.append(text_lines(x, PLOT_TOP - 24, LOCATION_LABELS[location], size=11))
+        parts.append(text_lines(x, PLOT_BOTTOM + 24, LOCATION_LABELS[location], size=11))
+
+    bar_width = x_position(0.8) - x_position(0)
+    for location, start, end, label, color, text_color in blocks:
+        start = max(start, grid.open_minute / 60)
+        end = min(end, grid.close_minute / 60)
+        if location not in LOCATION_COLUMNS or end <= start:
+            continue
+        x = x_position(LOCATION_COLUMNS[location])
+        top = y_position(start, grid)
+        parts.append(f'<rect x="{x - bar_width / 2:.1f}" y="{top:.1f}" width="{bar_width:.1f}" '
+                     f'height="{y_position(end, grid) - top:.1f}" fill="{hex_color(color)}"/>')
+        if label:
+            parts.append(text_lines(x, y_position((start + end) / 2, grid), label, size=11,
+                                    color=hex_color(text_color)))
+
+    parts.append(f'<rect x="{PLOT_LEFT}" y="{PLOT_TOP}" width="{PLOT_RIGHT - PLOT_LEFT}" '
+                 f'height="{PLOT_BOTTOM - PLOT_TOP}" fill="none" stroke="black"/>')
+
+    # Legend in two columns
+    for i, (name, color) in enumerate(legend):
+        x = PLOT_LEFT + (i % 2) * (PLOT_RIGHT - PLOT_LEFT) / 2
+        y = PLOT_BOTTOM + 60 + (i // 2) * LEGEND_ROW_HEIGHT
+        parts.append(f'<rect x="{x:.1f}" y="{y - 6:.1f}" width="24" height="12" fill="{hex_color(color)}"/>')
+        parts.append(text_lines(x + 30, y, name, size=12, anchor='start'))
+
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def schedule_html(title: str, blocks: list[tuple], legend: list[tuple] = (), grid: TimeGrid = TimeGrid()) -> HTML:
+    """Wrap the rendered schedule so it can be displayed in an Output widget."""
+
+    return HTML(render_schedule(title, blocks, legend, grid))
@@ -0,0 +1,171 @@
+"""Check that readers never see a torn snapshot while another thread keeps publishing new ones.
+
+Runs offline on synthetic reservations, with no login. The writer rebuilds every snapshot with the
+same steps as a data refresh:
+
+    python snapshot_stress.py --readers 4 --seconds 10
+"""
+
+# Standard packages
+import argparse
+import datetime
+import random
+import sys
+import threading
+import time
+
+# Third-party packages
+import numpy as np
+import pandas as pd
+
+# Project packages
+import analytics as fth_analytics
+import catalog as fth_catalog
+import config
+import field_trip_helper as fth
+
+
+def synthetic_reservations(days: int, groups: int, seed: int = 0) -> pd.DataFrame:
+    """Return reservations shaped like retrieve_data()'s frame on the next open field trip days.
+
+    Each group has an admission row and a program at a random location and time, so different seeds
+    give different admission totals and booked slots.
+    """
+
+    rng = np.random.default_rng(seed)
+    today = datetime.date.today()
+    dates = fth_analytics.field_trip_days(today, today + datetime.timedelta(days=365))[:days]
+    n = len(dates) * groups
+
+    arrival = pd.to_datetime(np.repeat(dates, groups)) + pd.Timedelta('9.5 h')
+    names = [f"School {i}" for i in rng.integers(0, 50, n)]
+    admission = pd.DataFrame({
+        "Name": names,
+        "Arrival": arrival,
+        "Departure": arrival + pd.Timedelta('4 h'),
+        "Program": "Admission",
+        "Category": "Admission",
+        "Location": None,
+        "Ticket type": "Student",
+        "Quantity": rng.integers(10, 100, n),
+        "Capacity": 0,
+        "Start time": pd.NaT,
+        "End time": pd.NaT,
+        "Address": [name + " Address" for name in names],
+    })
+
+    start = arrival.normalize() + pd.to_timedelta(9 + rng.integers(0, 20, n) * 0.25, unit='h')
+    programs = admission.assign(
+        Program="School program",
+        Category="Program",
+        Location=rng.choice(fth_catalog.LOCATIONS, n),
+        Capacity=60,
+        **{"Start time": start, "End time": start + pd.to_timedelta(rng.choice([0.5, 1], n), unit='h')},
+    )
+    return pd.concat([admission, programs], ignore_index=True)
+
+
+def build_snapshot_parts(raw: pd.DataFrame, grid) -> tuple:
+    """Run the same load steps as retrieve_data() on a reservation frame, without publishing."""
+
+    catalog = fth_catalog.build_catalog(raw)
+    data = fth_catalog.add_ids(raw, catalog)
+    return data, fth.build_search_schedule(data, grid, catalog), fth.build_date_index(data), grid, catalog
+
+
+def check_snapshot(snapshot: config.Snapshot, date: datetime.date) -> bool:
+    """Check one date of a pinned snapshot against its own data.
+
+    The get_date() index path must return the rows found by scanning the data, and the schedule must
+    hold that day's admission totals and cover every booking.
+    """
+
+    scanned = snapshot.data[snapshot.data.Arrival.dt.date == date]
+    if not fth.get_date(snapshot.data, date).index.equals(scanned.index):
+        return False
+
+    day = snapshot.schedule_dict[str(date)]
+    if (day['Admission']['groups'], day['Admission']['quantity']) != fth.get_admission(snapshot.data, date):
+        return False
+
+    bookings = scanned[scanned.Location.isin(fth_catalog.LOCATIONS)]
+    for location, start_time, end_time in zip(bookings.Location, bookings["Start time"], bookings["End time"]):
+        if snapshot.grid.mask(start_time, end_time) & ~day[location]:
+            return False
+    return True
+
+
+def stress(readers: int = 4, seconds: float = 10, days: int = 20, groups: int = 3) -> dict:
+    """Rebuild and publish snapshots from alternating reservation frames while readers check each pinned one.
+
+    Each publish runs add_ids(), build_search_schedule() and build_date_index() afresh, so a build step
+    that changed an already published snapshot would show up as an inconsistent read. The published
+    snapshot is restored afterwards.
+    """
+
+    original = config.current()
+    frames = [synthetic_reservations(days, groups, seed) for seed in [1, 2]]
+    stop = threading.Event()
+    counts = {'publishes': 0, 'checks': 0, 'failures': 0, 'version_regressions': 0, 'versions_seen': 0}
+    counts_lock = threading.Lock()
+
+    # Readers need something to check from the start
+    config.publish(*build_snapshot_parts(frames[0], original.grid))
+
+    def writer():
+        publishes = 0
+        while not stop.is_set():
+            config.publish(*build_snapshot_parts(frames[(publishes + 1) % 2], original.grid))
+            publishes += 1
+        with counts_lock:
+            counts['publishes'] += publishes
+
+    def reader(seed: int):
+        rng = random.Random(seed)
+        last_version = 0
+        checks = failures = regressions = versions = 0
+        while not stop.is_set():
+            snapshot = config.current()
+            if snapshot.version < last_version:
+                regressions += 1
+            if snapshot.version != last_version:
+                versions += 1
+            last_version = snapshot.version
+            if not check_snapshot(snapshot, rng.choice(list(snapshot.date_index))):
+                failures += 1
+            checks += 1
+            # Yield the GIL between checks so the writer keeps rebuilding
+            time.sleep(0.005)
+        with counts_lock:
+            counts['checks'] += checks
+            counts['failures'] += failures
+            counts['version_regressions'] += regressions
+            counts['versions_seen'] += versions
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    config.publish(original.data, original.schedule_dict, original.date_index, original.grid, original.catalog)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent reader/writer check of the snapshot swap")
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    result = stress(args.readers, args.seconds)
+    print(f"{result['publishes']} publishes, {result['checks']} reader checks across "
+          f"{result['versions_seen']} versions seen, {result['failures']} inconsistent snapshots, "
+          f"{result['version_regressions']} version regressions")
+    sys.exit(1 if result['failures'] or result['version_regressions'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# Standard packages
+import datetime
+import math
+from typing import NamedTuple
+
+
+class TimeGrid(NamedTuple):
+    """Integer time slots of resolution minutes between the opening and closing times.
+
+    Times are given in minutes after midnight. A location's day is stored as an int bitmask where bit i
+    is set when slot i is booked, so searches and overlap checks are bit operations.
+    """
+
+    open_minute: int = 9 * 60
+    close_minute: int = 15 * 60
+    resolution: int = 15
+
+    @property
+    def n_slots(self) -> int:
+        return (self.close_minute - self.open_minute) // self.resolution
+
+    @property
+    def full(self) -> int:
+        """Return the mask with every slot set."""
+
+        return (1 << self.n_slots) - 1
+
+    def minutes(self, time) -> int:
+        """Return minutes after midnight for a decimal hour (14.5), datetime.time or timestamp."""
+
+        if isinstance(time, (datetime.time, datetime.datetime)):
+            return time.hour * 60 + time.minute
+        return round(time * 60)
+
+    def time(self, slot: int) -> float:
+        """Return the start of a slot as decimal hours."""
+
+        return (self.open_minute + slot * self.resolution) / 60
+
+    def slot_count(self, duration: float) -> int:
+        """Return the number of slots needed for a duration in hours."""
+
+        return max(1, math.ceil(round(duration * 60) / self.resolution))
+
+    def span(self, first: int, last: int) -> int:
+        """Return the mask of slots first to last (exclusive), clipped to the grid."""
+
+        first = max(first, 0)
+        last = min(last, self.n_slots)
+        if last <= first:
+            return 0
+        return ((1 << (last - first)) - 1) << first
+
+    def mask(self, start, end) -> int:
+        """Return the mask of every slot that overlaps the time from start to end."""
+
+        start = self.minutes(start) - self.open_minute
+        end = self.minutes(end) - self.open_minute
+        return self.span(start // self.resolution, -(-end // self.resolution))
+
+    def window(self, start, end) -> int:
+        """Return the mask of slots that begin between start (inclusive) and end (exclusive)."""
+
+        start = self.minutes(start) - self.open_minute
+        end = self.minutes(end) - self.open_minute
+        return self.span(-(-start // self.resolution), -(-end // self.resolution))
+
+    def runs(self, bits: int):
+        """Yield (first slot, length) for each run of set bits, in slot order."""
+
+        while bits:
+            first = (bits & -bits).bit_length() - 1
+            shifted = bits >> first
+            length = (~shifted & (shifted + 1)).bit_length() - 1
+            yield first, length
+            bits &= ~(((1 << length) - 1) << first)